@@ -1,20 +1,28 @@
 from pathlib import Path
-from threading import Thread
-from hashlib import sha256
+from functools import lru_cache
+from threading import Lock, Thread
+import hashlib
 import time
 import json
 import os
-
-try:
-    import requests
-except ImportError:
-    requests = None
+import re
 
 from .config import Config
 from .cmake import *
 from .platform import Platform
 from .error import fatal_error
 
+# matches the version in CPMAddPackage("gh:dankmeme01/geobuild#version")
+_SELF_DEP_RE = re.compile(r'dankmeme01/geobuild[#@]([^"\s)]+)')
+
+_SOURCE_EXTENSIONS = (".c", ".cpp")
+_APPLE_SOURCE_EXTENSIONS = (".c", ".cpp", ".m", ".mm")
+
+@lru_cache(maxsize=4096)
+def _resolve_cached(path: str) -> Path:
+    # paths don't change during a single run, and resolving is slow on windows
+    return Path(path).resolve()
+
 class Build:
     def __init__(self) -> None:
         self.finalized = False
@@ -22,12 +30,15 @@ class Build:
         self.mod_json = None
         self.config = Config()
         self._cmake = CMakeFile(self.config)
+        self._session = None
+        self._self_dep: CPMDep | None = None
+        self._self_dep_checked = False
 
     def _to_path(self, p: Path | str) -> Path:
         if not isinstance(p, Path):
             p = self.config.project_dir / p
 
-        return p.resolve()
+        return _resolve_cached(str(p))
 
     @property
     def platform(self) -> Platform:
@@ -55,12 +66,13 @@ class Build:
 
     def link_library(self, name: str | Path, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
         """Links a single library to the given target. If the target is None, ${PROJECT_NAME} is assumed."""
-        self._cmake.libraries.append(CMakeLibrary(name, privacy, target))
+        self._cmake.libraries.setdefault((str(name), privacy, target), CMakeLibrary(name, privacy, target))
 
     def link_libraries(self, *names: str | Path, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
         """Links multiple libraries to the given target. If the target is None, ${PROJECT_NAME} is assumed."""
+        libraries = self._cmake.libraries
         for name in names:
-            self._cmake.libraries.append(CMakeLibrary(name, privacy, target))
+            libraries.setdefault((str(name), privacy, target), CMakeLibrary(name, privacy, target))
 
     def add_source_dir(self, path: Path | str, recursive: bool = True):
         """Adds all source files in the given directory as source files to the build, using CMake glob.
@@ -74,31 +86,34 @@ class Build:
 
             self._cmake.glob_dirs.add((path, recursive))
         else:
-            self.add_source_dir(path / "*.c", recursive)
-            self.add_source_dir(path / "*.cpp", recursive)
-            if self.platform.is_apple():
-                self.add_source_dir(path / "*.m", recursive)
-                self.add_source_dir(path / "*.mm", recursive)
+            if not path.exists():
+                raise FileNotFoundError(f"Source directory {path} does not exist")
+
+            exts = _APPLE_SOURCE_EXTENSIONS if self.platform.is_apple() else _SOURCE_EXTENSIONS
+            self._cmake.glob_dirs.update((path / f"*{ext}", recursive) for ext in exts)
 
     def add_source_file(self, path: Path | str):
         self._cmake.source_files.add(self._to_path(path))
 
     def add_include_dir(self, path: Path | str, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
-        self._cmake.include_dirs.append(CMakeIncludeDir(self._to_path(path), privacy, target))
+        path = self._to_path(path)
+        self._cmake.include_dirs.setdefault((path, privacy, target), CMakeIncludeDir(path, privacy, target))
 
     def add_compile_option(self, option: str, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
-        self._cmake.compile_options.append(CMakeCompileOption(option, privacy, target))
+        self._cmake.compile_options.setdefault((option, privacy, target), CMakeCompileOption(option, privacy, target))
 
     def add_compile_options(self, *option: str, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
+        compile_options = self._cmake.compile_options
         for opt in option:
-            self.add_compile_option(opt, privacy, target)
+            compile_options.setdefault((opt, privacy, target), CMakeCompileOption(opt, privacy, target))
 
     def add_link_option(self, option: str, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
-        self._cmake.link_options.append(CMakeLinkOption(option, privacy, target))
+        self._cmake.link_options.setdefault((option, privacy, target), CMakeLinkOption(option, privacy, target))
 
     def add_link_options(self, *option: str, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
+        link_options = self._cmake.link_options
         for opt in option:
-            self.add_link_option(opt, privacy, target)
+            link_options.setdefault((opt, privacy, target), CMakeLinkOption(opt, privacy, target))
 
     def add_precompile_headers(self, *headers: Path | str, privacy: Privacy = Privacy.PRIVATE, target: str | None = None):
         self._cmake.pch.append(CMakePCH(list(headers), privacy, target))
@@ -171,7 +186,7 @@ class Build:
         if not path.exists():
             return
 
-        uid = sha256(str(path).encode()).hexdigest()[:16]
+        uid = hashlib.blake2b(str(path).encode(), digest_size=8).hexdigest()
         dest_path = self.config._geobuild_build_dir / f"_geobuild-reconfigure-{uid}"
 
         self._cmake.configures.add(CMakeConfigure(
@@ -219,28 +234,45 @@ class Build:
         # save mod json, if applicable
         if self.mod_json:
             path = self.config.project_dir / "mod.json"
-            path.write_text(json.dumps(self.mod_json, indent=4))
+            write_if_changed(path, json.dumps(self.mod_json, indent=4).encode())
 
-        # determine if we should check for updates using the last update file & env var
+        # determine if we should check for updates using the env var,
+        # results are cached per dependency so this only hits the network when needed
         do_check = truthy(self.config.var("GEOBUILD_UPDATE_CHECK", os.environ.get("GEOBUILD_UPDATE_CHECK", "0")))
         if do_check:
-            p = Path(self.config.build_dir / "_geobuild-last-update.txt")
-            if not p.exists() or (time.time() - p.stat().st_mtime) > 60 * 60 * 24:
-                if self.check_for_updates():
-                    p.touch(exist_ok=True)
+            self.check_for_updates()
 
     # Auto update stuff
 
+    def _get_session(self):
+        # requests is slow to import and only needed for update checks, so import it lazily
+        if self._session is None:
+            try:
+                import requests
+                from requests.adapters import HTTPAdapter
+            except ImportError:
+                return None
+
+            # reuse connections between update check requests
+            self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+        return self._session
+
+    def _gh_token(self) -> str:
+        return self.config.var("GITHUB_TOKEN", os.environ.get("GITHUB_TOKEN") or "").strip()
+
     def _gh_request(self, url: str):
-        assert requests
+        session = self._get_session()
+        assert session
 
         headers = {}
         # check for github token
-        gh_token = self.config.var("GITHUB_TOKEN", os.environ.get("GITHUB_TOKEN") or "").strip()
+        gh_token = self._gh_token()
         if gh_token:
             headers["Authorization"] = f"Bearer {gh_token}"
 
-        r = requests.get(url, headers=headers)
+        r = session.get(url, headers=headers, timeout=10)
 
         if not r.ok:
             print(f"Request for {url} failed: {r.status_code} {r.reason}")
@@ -248,11 +280,13 @@ class Build:
 
         return r.json()
 
+    def _gh_api_url(self, repo: str) -> str:
+        return repo.replace(".git", "").replace("github.com", "api.github.com/repos")
+
     def get_last_gh_release(self, repo: str) -> str | None:
-        assert requests
+        assert self._get_session()
 
-        url = repo.replace(".git", "").replace("github.com", "api.github.com/repos") + "/tags"
-        tags = self._gh_request(url)
+        tags = self._gh_request(self._gh_api_url(repo) + "/tags?per_page=1")
 
         if not isinstance(tags, list) or len(tags) == 0:
             print(f"No tags found for {repo}")
@@ -261,10 +295,9 @@ class Build:
         return tags[0]["name"]
 
     def get_last_gh_commit(self, repo: str) -> str | None:
-        assert requests
+        assert self._get_session()
 
-        url = repo.replace(".git", "").replace("github.com", "api.github.com/repos") + "/commits"
-        commits = self._gh_request(url)
+        commits = self._gh_request(self._gh_api_url(repo) + "/commits?per_page=1")
 
         if not isinstance(commits, list) or len(commits) == 0:
             print(f"No commits found for {repo}")
@@ -272,11 +305,94 @@ class Build:
 
         return commits[0]["sha"]
 
+    def _batch_gh_query(self, deps: list[CPMDep]) -> dict[str, tuple[str | None, str | None]]:
+        """Fetches the latest tag and the default branch HEAD of all given GitHub repos in a single GraphQL request.
+           Returns a dict of repo URL -> (tag, commit). Repos that are missing from the result should be fetched via the REST API."""
+        session = self._get_session()
+        assert session
+
+        import requests
+
+        gh_token = self._gh_token()
+        if not gh_token:
+            # graphql api requires authentication
+            return {}
+
+        repos: dict[str, str] = {}
+        query = ""
+
+        for dep in deps:
+            if dep.repo in repos.values() or "github.com/" not in dep.repo:
+                continue
+
+            owner, _, name = dep.repo.split("github.com/", 1)[1].removesuffix(".git").partition("/")
+            if not owner or not name:
+                continue
+
+            alias = f"repo{len(repos)}"
+            repos[alias] = dep.repo
+            query += (
+                f"{alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ "
+                "refs(refPrefix: \"refs/tags/\", first: 1, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) { nodes { name } } "
+                "defaultBranchRef { target { oid } } }\n"
+            )
+
+        if not repos:
+            return {}
+
+        try:
+            r = session.post(
+                "https://api.github.com/graphql",
+                json={"query": f"query {{\n{query}}}"},
+                headers={"Authorization": f"Bearer {gh_token}"},
+                timeout=10,
+            )
+        except requests.RequestException as e:
+            print(f"GraphQL request for {len(repos)} repos failed: {e}")
+            return {}
+
+        if not r.ok:
+            print(f"GraphQL request for {len(repos)} repos failed: {r.status_code} {r.reason}")
+            return {}
+
+        try:
+            payload = r.json()
+        except ValueError:
+            print(f"GraphQL request for {len(repos)} repos returned an invalid response")
+            return {}
+
+        data = payload.get("data") if isinstance(payload, dict) else None
+        if not isinstance(data, dict):
+            print(f"Unexpected GraphQL response: {payload}")
+            return {}
+
+        out = {}
+
+        for alias, repo in repos.items():
+            result = data.get(alias)
+            if not result:
+                continue
+
+            try:
+                tags = (result.get("refs") or {}).get("nodes") or []
+                branch = result.get("defaultBranchRef") or {}
+
+                out[repo] = (
+                    tags[0]["name"] if tags else None,
+                    (branch.get("target") or {}).get("oid"),
+                )
+            except (AttributeError, KeyError, TypeError, IndexError):
+                # malformed entry, let the REST path handle this repo
+                continue
+
+        return out
+
     def get_latest_geode_release(self, gd_ver: str) -> str | None:
-        assert requests
+        session = self._get_session()
+        assert session
 
         url = f"https://api.geode-sdk.org/v1/loader/versions/latest?gd={gd_ver}"
-        r = requests.get(url)
+        r = session.get(url, timeout=10)
         r.raise_for_status()
         data = r.json()
 
@@ -287,10 +403,11 @@ class Build:
             return None
 
     def get_last_geode_mod_release(self, mod_id: str) -> str | None:
-        assert requests
+        session = self._get_session()
+        assert session
 
         url = f"https://api.geode-sdk.org/v1/mods/{mod_id}/versions?per_page=1"
-        r = requests.get(url)
+        r = session.get(url, timeout=10)
         r.raise_for_status()
         data = r.json()
 
@@ -300,8 +417,25 @@ class Build:
             print(f"Unexpected response when fetching '{url}': {data}")
             return None
 
+    def _update_cache_path(self) -> Path:
+        return self.config.build_dir / "_geobuild-update-cache.json"
+
+    def _load_update_cache(self) -> dict:
+        try:
+            cache = json.loads(self._update_cache_path().read_text())
+        except (OSError, ValueError):
+            return {}
+
+        return cache if isinstance(cache, dict) else {}
+
+    def _save_update_cache(self, cache: dict):
+        try:
+            self._update_cache_path().write_text(json.dumps(cache, indent=4))
+        except OSError as e:
+            print(f"Failed to save update cache: {e}")
+
     def check_for_updates(self) -> bool:
-        if not requests:
+        if not self._get_session():
             print("WARN: requests module not found, cannot check for updates.")
             return False
 
@@ -313,46 +447,89 @@ class Build:
         start_time = time.time()
         print(f"Checking for CPM/Geode dep updates...")
 
-        threads = []
+        tasks = []
+        deps = list(self._cmake.deps)
+
+        # check for a geobuild update, for this we have to find what version of geobuild the user has right now
+        if dep := self._make_self_dependency():
+            deps.append(dep)
+
+        cache = self._load_update_cache()
+        cache_lock = Lock()
+
+        # results are reused for 24 hours, unless the pinned version changes
+        def cached_latest(key: str, pinned: str) -> str | None:
+            with cache_lock:
+                entry = cache.get(key)
+
+            if not isinstance(entry, dict) or entry.get("pinned") != pinned:
+                return None
+
+            ts, latest = entry.get("ts"), entry.get("latest")
+            if not isinstance(ts, (int, float)) or not isinstance(latest, str):
+                return None
+
+            if time.time() - ts > 60 * 60 * 24:
+                return None
+
+            return latest
+
+        def store_latest(key: str, pinned: str, latest: str):
+            with cache_lock:
+                cache[key] = {"pinned": pinned, "latest": latest, "ts": time.time()}
+
+        # if possible, fetch the state of all github repos at once
+        batched = self._batch_gh_query([dep for dep in deps if not cached_latest(dep.repo, dep.tag)])
 
         def do_fetch(dep: CPMDep):
             use_tag = '.' in dep.tag or 'v' in dep.tag
 
-            if use_tag:
-                tag = self.get_last_gh_release(dep.repo)
-                if not tag:
-                    print(f"Failed to fetch latest release for {dep.repo}")
-                    return
+            latest = cached_latest(dep.repo, dep.tag)
+            from_cache = latest is not None
 
-                current, latest = dep.tag, tag
-            else:
-                commit = self.get_last_gh_commit(dep.repo)
-                if not commit:
-                    print(f"Failed to fetch latest commit for {dep.repo}")
+            if latest is None:
+                if dep.repo in batched:
+                    latest = batched[dep.repo][0 if use_tag else 1]
+                elif use_tag:
+                    latest = self.get_last_gh_release(dep.repo)
+                else:
+                    latest = self.get_last_gh_commit(dep.repo)
+
+                if not latest:
+                    print(f"Failed to fetch latest {'release' if use_tag else 'commit'} for {dep.repo}")
                     return
 
-                shortest_len = min(len(dep.tag), len(commit))
+                store_latest(dep.repo, dep.tag, latest)
+
+            current = dep.tag
 
-                current, latest = dep.tag[:shortest_len], commit[:shortest_len]
+            if not use_tag:
+                shortest_len = min(len(current), len(latest))
+                current, latest = current[:shortest_len], latest[:shortest_len]
+
+            suffix = " (cached)" if from_cache else ""
 
             if current != latest:
-                print(f"Update available for {dep.name}: {current} -> {latest}")
+                print(f"Update available for {dep.name}: {current} -> {latest}{suffix}")
             else:
-                print(f"{dep.name} is up to date ({latest})")
+                print(f"{dep.name} is up to date ({latest}){suffix}")
 
         def do_fetch_geode(geode_ver: str, gd_ver: str):
-            latest = self.get_latest_geode_release(gd_ver)
-            if latest is None: return
+            key = f"geode:{gd_ver}"
+            latest = cached_latest(key, geode_ver)
+            suffix = " (cached)" if latest is not None else ""
+
+            if latest is None:
+                latest = self.get_latest_geode_release(gd_ver)
+                if latest is None: return
+                store_latest(key, geode_ver, latest)
 
             if geode_ver != latest:
-                print(f"Update available for Geode: {geode_ver} -> {latest}")
+                print(f"Update available for Geode: {geode_ver} -> {latest}{suffix}")
             else:
-                print(f"Geode is up to date ({latest})")
+                print(f"Geode is up to date ({latest}){suffix}")
 
         def do_fetch_mod(id: str, spec: str | dict):
-            latest = self.get_last_geode_mod_release(id)
-            if latest is None: return
-
             if isinstance(spec, str):
                 current = spec
             elif isinstance(spec, dict) and "version" in spec:
@@ -363,17 +540,22 @@ class Build:
 
             stripped = current.lstrip("^~<>=v")
 
+            key = f"mod:{id}"
+            latest = cached_latest(key, stripped)
+            suffix = " (cached)" if latest is not None else ""
+
+            if latest is None:
+                latest = self.get_last_geode_mod_release(id)
+                if latest is None: return
+                store_latest(key, stripped, latest)
+
             if stripped != latest:
-                print(f"Update available for dependency '{id}': {stripped} -> {latest}")
+                print(f"Update available for dependency '{id}': {stripped} -> {latest}{suffix}")
             else:
-                print(f"Mod '{id}' is up to date ({latest})")
-
-        for dep in self._cmake.deps:
-            threads.append(Thread(target=do_fetch, args=(dep,)))
+                print(f"Mod '{id}' is up to date ({latest}){suffix}")
 
-        # check for a geobuild update, for this we have to find what version of geobuild the user has right now
-        if dep := self._make_self_dependency():
-            threads.append(Thread(target=do_fetch, args=(dep,)))
+        for dep in deps:
+            tasks.append((dep.name, do_fetch, dep))
 
         # check for geode and for geode dep updates
         if self.mod_json:
@@ -385,38 +567,53 @@ class Build:
                 break
 
             if gd_ver:
-                threads.append(Thread(target=do_fetch_geode, args=(geode, gd_ver)))
+                tasks.append(("Geode", do_fetch_geode, geode, gd_ver))
 
         if self.mod_json and 'dependencies' in self.mod_json:
             for id, spec in self.mod_json["dependencies"].items():
-                threads.append(Thread(target=do_fetch_mod, args=(id, spec)))
+                tasks.append((id, do_fetch_mod, id, spec))
+
+        def run_task(name: str, func, *args):
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Update check for {name} failed: {e}")
+
+        # daemon threads, so that a hung request can't keep the process (and cmake) waiting after we give up on it
+        threads = [Thread(target=run_task, args=task, daemon=True) for task in tasks]
+        for t in threads:
+            t.start()
 
-        [t.start() for t in threads]
-        [t.join() for t in threads]
+        deadline = time.time() + 30
+        for (name, *_), t in zip(tasks, threads):
+            t.join(max(0.0, deadline - time.time()))
+            if t.is_alive():
+                print(f"WARN: update check for {name} timed out, abandoning")
+
+        with cache_lock:
+            self._save_update_cache(cache)
 
         print(f"Update check complete in {time.time() - start_time:.3f}s")
 
         return True
 
     def _make_self_dependency(self) -> CPMDep | None:
-        cmake = (self.config.project_dir / "CMakeLists.txt").read_text()
+        if self._self_dep_checked:
+            return self._self_dep
 
-        version = None
+        self._self_dep_checked = True
 
-        if "dankmeme01/geobuild" in cmake:
-            remainder = cmake[cmake.index("dankmeme01/geobuild") + len("dankmeme01/geobuild") + 1:]
-            ver = remainder.partition('"')[0]
-            if ver:
-                version = ver.strip()
-
-        if not version:
+        cmake = (self.config.project_dir / "CMakeLists.txt").read_text()
+        m = _SELF_DEP_RE.search(cmake)
+        if not m:
             return None
 
-        return CPMDep(
+        self._self_dep = CPMDep(
             "geobuild",
             "https://github.com/dankmeme01/geobuild",
-            version,
+            m.group(1),
             {},
             Privacy.PRIVATE,
         )
 
+        return self._self_dep
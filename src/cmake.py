@@ -3,6 +3,7 @@ from pathlib import Path
 from dataclasses import dataclass, field
 from enum import Enum
 import hashlib
+import io
 
 from .config import Config
 
@@ -21,7 +22,8 @@ __all__ = [
     "CMakeFile",
     "CPMDep",
     "truthy",
-    "falsy"
+    "falsy",
+    "write_if_changed",
 ]
 
 class Privacy(Enum):
@@ -29,7 +31,7 @@ class Privacy(Enum):
     PUBLIC = "PUBLIC"
     INTERFACE = "INTERFACE"
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CPMDep:
     name: str
     repo: str # always a URL
@@ -37,38 +39,38 @@ class CPMDep:
     options: dict[str, str]
     privacy: Privacy
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeDefinition:
     key: str
     value: str
     target: str | None
     privacy: Privacy
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeLibrary:
     name: str | Path
     privacy: Privacy
     target: str | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeIncludeDir:
     path: Path
     privacy: Privacy
     target: str | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeCompileOption:
     option: str
     privacy: Privacy
     target: str | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeLinkOption:
     option: str
     privacy: Privacy
     target: str | None
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeCacheVariable:
     key: str
     value: str
@@ -76,25 +78,25 @@ class CMakeCacheVariable:
     force: bool
     desc: str
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakeOption:
     key: str
     default: bool
     desc: str
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CMakePCH:
     headers: list[Path | str]
     privacy: Privacy
     target: str | None
 
-@dataclass(frozen=True, unsafe_hash=True)
+@dataclass(frozen=True, unsafe_hash=True, slots=True)
 class CMakeConfigure:
     path: Path
     dest_path: Path
     copyonly: bool
 
-@dataclass
+@dataclass(slots=True)
 class CMakeUnityOptions:
     batch_size: int
     id_macro: str
@@ -109,6 +111,19 @@ def truthy(val: str) -> bool:
 def falsy(val: str) -> bool:
     return val.lower() in ("0", "false", "no", "off", "n")
 
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Writes the data to the given path, unless the file already has the exact same contents.
+       This keeps the mtime intact, so CMake doesn't needlessly reconfigure or rebuild. Returns whether the file was written."""
+
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.write_bytes(data)
+    return True
+
 @dataclass
 class CMakeFile:
     config: Config
@@ -121,16 +136,17 @@ class CMakeFile:
     raw_statements: list[str]            = field(default_factory=list)
     configures: set[CMakeConfigure]      = field(default_factory=set)
 
-    libraries: list[CMakeLibrary]        = field(default_factory=list)
-    include_dirs: list[CMakeIncludeDir]  = field(default_factory=list)
+    # keyed by (name/path/option, privacy, target), to avoid duplicates while preserving order
+    libraries: dict[tuple, CMakeLibrary]        = field(default_factory=dict)
+    include_dirs: dict[tuple, CMakeIncludeDir]  = field(default_factory=dict)
 
     glob_dirs: set[tuple[Path, bool]]    = field(default_factory=set)
     source_files: set[Path]              = field(default_factory=set)
     pch: list[CMakePCH]                  = field(default_factory=list)
 
     deps: list[CPMDep]                   = field(default_factory=list)
-    compile_options: list[CMakeCompileOption] = field(default_factory=list)
-    link_options: list[CMakeLinkOption]       = field(default_factory=list)
+    compile_options: dict[tuple, CMakeCompileOption] = field(default_factory=dict)
+    link_options: dict[tuple, CMakeLinkOption]       = field(default_factory=dict)
 
     unity_opts: CMakeUnityOptions | None = None
 
@@ -177,16 +193,17 @@ class CMakeFile:
         def get_target(t: str | None) -> str:
             return t or self.config.project_name
 
-        out = "# Generated by pre-build.py, DO NOT EDIT THIS FILE DIRECTLY\n\n"
+        out = io.StringIO()
+        out.write("# Generated by pre-build.py, DO NOT EDIT THIS FILE DIRECTLY\n\n")
 
         # Options
         for option in self.options:
             default_str = "ON" if option.default else "OFF"
-            out += f'option({option.key} "{option.desc}" {default_str})\n'
+            out.write(f'option({option.key} "{option.desc}" {default_str})\n')
 
         # Variables
         for key, value in self.vars.items():
-            out += f"set({key} \"{value}\")\n"
+            out.write(f"set({key} \"{value}\")\n")
 
         # Cache variables
         for key, cvar in self.cache_vars.items():
@@ -196,26 +213,26 @@ class CMakeFile:
             if cvar.force:
                 cache_str += "FORCE "
 
-            out += f'set({key} "{cvar.value}" {cache_str.strip()})\n'
+            out.write(f'set({key} "{cvar.value}" {cache_str.strip()})\n')
 
         # Messages
         for message in self.messages:
-            out += f'message(STATUS "{message}")\n'
+            out.write(f'message(STATUS "{message}")\n')
 
         # Configures
-        for conf in self.configures:
-            out += f'configure_file({self.convert_path(conf.path)} {self.convert_path(conf.dest_path)}'
+        for conf in sorted(self.configures, key=lambda c: (c.path, c.dest_path)):
+            out.write(f'configure_file({self.convert_path(conf.path)} {self.convert_path(conf.dest_path)}')
             if conf.copyonly:
-                out += " COPYONLY"
-            out += ")\n"
+                out.write(" COPYONLY")
+            out.write(")\n")
 
         # Sources
-        out += "\n\n# Source files\n"
-        out += "set(SOURCES \"\")\n"
+        out.write("\n\n# Source files\n")
+        out.write("set(SOURCES \"\")\n")
 
         source_var_names = []
 
-        for path, recursive in self.glob_dirs:
+        for path, recursive in sorted(self.glob_dirs):
             converted = self.convert_path(path)
             hashed = hashlib.sha256(converted.encode()).hexdigest()[:16]
 
@@ -224,78 +241,83 @@ class CMakeFile:
 
             source_var_names.append(name)
             glob_type = "GLOB_RECURSE" if recursive else "GLOB"
-            out += f"file({glob_type} {name} CONFIGURE_DEPENDS {converted})\n"
+            out.write(f"file({glob_type} {name} CONFIGURE_DEPENDS {converted})\n")
 
             # skip unity and pch if this is .m/.mm
             if path.name.endswith(('.mm', '.m')):
-                out += f"set_source_files_properties(${{{name}}} PROPERTIES SKIP_PRECOMPILE_HEADERS ON SKIP_UNITY_BUILD_INCLUSION ON)\n"
+                out.write(f"set_source_files_properties(${{{name}}} PROPERTIES SKIP_PRECOMPILE_HEADERS ON SKIP_UNITY_BUILD_INCLUSION ON)\n")
 
         for name in source_var_names:
-            out += f"list(APPEND SOURCES ${{{name}}})\n"
+            out.write(f"list(APPEND SOURCES ${{{name}}})\n")
+
+        objc_sources = []
 
-        for path in self.source_files:
+        for path in sorted(self.source_files):
             p = self.convert_path(path)
-            out += f"list(APPEND SOURCES {p})\n"
-            # skip unity and pch
+            out.write(f"list(APPEND SOURCES {p})\n")
             if path.name.endswith(('.mm', '.m')):
-                out += f"set_source_files_properties({p} PROPERTIES SKIP_PRECOMPILE_HEADERS ON SKIP_UNITY_BUILD_INCLUSION ON)\n"
+                objc_sources.append(p)
+
+        # skip unity and pch, with a single call for all files
+        if objc_sources:
+            out.write(f"set_source_files_properties({' '.join(objc_sources)} PROPERTIES SKIP_PRECOMPILE_HEADERS ON SKIP_UNITY_BUILD_INCLUSION ON)\n")
 
         # Add library
-        out += f"\nadd_library({self.config.project_name} SHARED ${{SOURCES}})\n"
-        out += f"set(_geobuild_project_name {self.config.project_name})\n"
+        out.write(f"\nadd_library({self.config.project_name} SHARED ${{SOURCES}})\n")
+        out.write(f"set(_geobuild_project_name {self.config.project_name})\n")
 
         # apply unity if enabled
         if self.unity_opts is not None:
-            out += f"set_target_properties({self.config.project_name} PROPERTIES UNITY_BUILD ON "
+            out.write(f"set_target_properties({self.config.project_name} PROPERTIES UNITY_BUILD ON ")
             if self.unity_opts.batch_size > 0:
-                out += f"UNITY_BUILD_BATCH_SIZE {self.unity_opts.batch_size} "
+                out.write(f"UNITY_BUILD_BATCH_SIZE {self.unity_opts.batch_size} ")
             if self.unity_opts.id_macro:
-                out += f"UNITY_BUILD_ID_MACRO \"{self.unity_opts.id_macro}\" "
-            out += ")\n"
+                out.write(f"UNITY_BUILD_ID_MACRO \"{self.unity_opts.id_macro}\" ")
+            out.write(")\n")
 
         # CPM deps
-        out += "\n# CPM Dependencies\n"
+        out.write("\n# CPM Dependencies\n")
         for dep in self.deps:
-            out += f"CPMAddPackage(\n"
-            out += f'    NAME {dep.name}\n'
-            out += f'    GIT_REPOSITORY "{dep.repo}"\n'
-            out += f'    GIT_TAG "{dep.tag}"\n'
+            out.write(f"CPMAddPackage(\n")
+            out.write(f'    NAME {dep.name}\n')
+            out.write(f'    GIT_REPOSITORY "{dep.repo}"\n')
+            out.write(f'    GIT_TAG "{dep.tag}"\n')
             if len(dep.options) > 0:
-                out += f'    OPTIONS '
+                out.write(f'    OPTIONS ')
                 for (opt_key, opt_value) in dep.options.items():
-                    out += f'    "{opt_key} {opt_value}"\n'
+                    out.write(f'    "{opt_key} {opt_value}"\n')
 
-            out += f")\n"
+            out.write(f")\n")
 
         # Definitions
         for key, cdef in self.defs.items():
             val_str = f"={cdef.value}"
-            out += f"target_compile_definitions({get_target(cdef.target)} {cdef.privacy.name} {key}{val_str})\n"
+            out.write(f"target_compile_definitions({get_target(cdef.target)} {cdef.privacy.name} {key}{val_str})\n")
 
         # Include dirs
-        out += "\n# Include directories\n"
-        for idir in self.include_dirs:
-            out += f"target_include_directories({get_target(idir.target)} {idir.privacy.name} {self.convert_path(idir.path)})\n"
+        out.write("\n# Include directories\n")
+        for idir in self.include_dirs.values():
+            out.write(f"target_include_directories({get_target(idir.target)} {idir.privacy.name} {self.convert_path(idir.path)})\n")
 
         # Compile options
-        out += "\n# Compile options\n"
-        for opt in self.compile_options:
-            out += f"target_compile_options({get_target(opt.target)} {opt.privacy.name} \"{opt.option}\")\n"
+        out.write("\n# Compile options\n")
+        for opt in self.compile_options.values():
+            out.write(f"target_compile_options({get_target(opt.target)} {opt.privacy.name} \"{opt.option}\")\n")
 
         # Link options
-        out += "\n# Link options\n"
-        for opt in self.link_options:
-            out += f"target_link_options({get_target(opt.target)} {opt.privacy.name} \"{opt.option}\")\n"
+        out.write("\n# Link options\n")
+        for opt in self.link_options.values():
+            out.write(f"target_link_options({get_target(opt.target)} {opt.privacy.name} \"{opt.option}\")\n")
 
         # Precompile headers
-        out += "\n# Precompiled headers\n"
+        out.write("\n# Precompiled headers\n")
         for pch in self.pch:
             headers_str = ' '.join([f'{self.convert_header(hdr)}' for hdr in pch.headers])
-            out += f"target_precompile_headers({get_target(pch.target)} {pch.privacy.name} {headers_str})\n"
+            out.write(f"target_precompile_headers({get_target(pch.target)} {pch.privacy.name} {headers_str})\n")
 
         # Links
-        out += "\n# Linked libraries\n"
-        for lib in self.libraries:
+        out.write("\n# Linked libraries\n")
+        for lib in self.libraries.values():
             if isinstance(lib.name, Path):
                 name = self.convert_path(lib.name)
             elif '/' in lib.name or '\\' in lib.name:
@@ -304,17 +326,17 @@ class CMakeFile:
             else:
                 name = lib.name
 
-            out += f"target_link_libraries({get_target(lib.target)} {lib.privacy.name} {name})\n"
+            out.write(f"target_link_libraries({get_target(lib.target)} {lib.privacy.name} {name})\n")
 
         # Raw statements
-        out += "\n# Raw statements\n"
+        out.write("\n# Raw statements\n")
         for statement in self.raw_statements:
-            out += f"{statement}\n"
+            out.write(f"{statement}\n")
 
         # call setup_geode_mod
-        out += f"setup_geode_mod({self.config.project_name} LINK_TYPE PRIVATE)\n"
+        out.write(f"setup_geode_mod({self.config.project_name} LINK_TYPE PRIVATE)\n")
 
-        return out
+        return out.getvalue()
 
-    def save(self, path: Path):
-        path.write_text(self.export_str())
+    def save(self, path: Path) -> bool:
+        return write_if_changed(path, self.export_str().encode())
@@ -1,29 +1,36 @@
 from pathlib import Path
-from subprocess import Popen, PIPE, STDOUT
-import argparse
-import platform
+from functools import lru_cache
 import sys
 
 from .error import fatal_error
 from .platform import Platform
 
 def parse_cmake_vars(s: str) -> dict[str, str]:
-    s = s.strip(';')
-    parts = s.split(";;")
-    vars = {}
+    return dict(part.split("=", 1) for part in s.strip(';').split(";;") if "=" in part)
 
-    for part in parts:
-        if "=" not in part:
-            continue
-        key, _, value = part.partition("=")
-        vars[key] = value
+def _invoke_git(where: str, args: tuple[str, ...], capture: bool) -> tuple[int, str]:
+    from subprocess import Popen, PIPE, STDOUT, DEVNULL, call
 
-    return vars
+    if not capture:
+        return (call(["git", *args], cwd=where, stdout=DEVNULL, stderr=DEVNULL), "")
+
+    proc = Popen(["git", *args], cwd=where, stdout=PIPE, stderr=STDOUT)
+    assert proc.stdout
+
+    output = proc.stdout.read().decode().strip()
+    code = proc.wait()
+
+    return (code, output)
+
+# for read-only queries (current commit, tags), git state does not change while geobuild runs
+_invoke_git_cached = lru_cache(maxsize=128)(_invoke_git)
 
 class Config:
     vars: dict[str, str]
 
     def __init__(self) -> None:
+        import argparse
+
         parser = argparse.ArgumentParser()
         # parser.add_argument("--cmake-vars", type=str, default="")
         args = parser.parse_args()
@@ -32,6 +39,9 @@ class Config:
         stdin_data = sys.stdin.read()
         self.vars = parse_cmake_vars(stdin_data)
 
+        # pygit2 handle to the sdk repo, False if pygit2 is unavailable
+        self._sdk_repo = None
+
     def var(self, key: str, default: str = "") -> str:
         return self.vars.get(key, default)
 
@@ -107,26 +117,56 @@ class Config:
     def is_cpp26(self) -> bool:
         return int(self.var_require("CMAKE_CXX_STANDARD")) >= 26
 
-    def invoke_git(self, where: Path, *args) -> tuple[int, str]:
-        proc = Popen(["git", *args], cwd=where, stdout=PIPE, stderr=STDOUT)
-        assert proc.stdout
+    def invoke_git(self, where: Path, *args, capture: bool = True) -> tuple[int, str]:
+        """Runs git with the given arguments and returns the exit code and output.
+           If capture is False, output is discarded and an empty string is returned instead."""
+        return _invoke_git(str(where), tuple(str(arg) for arg in args), capture)
+
+    def _query_git(self, where: Path, *args, capture: bool = True) -> tuple[int, str]:
+        # like invoke_git, but results are cached, only use for commands that don't modify the repo
+        return _invoke_git_cached(str(where), tuple(str(arg) for arg in args), capture)
 
-        output = proc.stdout.read().decode().strip()
-        code = proc.wait()
+    def _get_sdk_repo(self):
+        if self._sdk_repo is None:
+            try:
+                import pygit2
+                self._sdk_repo = pygit2.Repository(str(self.geode_sdk_path))
+            except Exception:
+                self._sdk_repo = False
 
-        return (code, output)
+        return self._sdk_repo or None
+
+    def _is_sdk_at_least_pygit2(self, ver: str) -> bool | None:
+        repo = self._get_sdk_repo()
+        if repo is None:
+            return None
+
+        import pygit2
+
+        try:
+            target = repo.revparse_single(ver).peel(pygit2.Commit).id
+            head = repo.head.target
+        except (KeyError, ValueError, pygit2.GitError):
+            # let git report the error
+            return None
+
+        return head == target or repo.descendant_of(head, target)
 
     def is_sdk_at_least(self, ver: str) -> bool:
-        code, output = self.invoke_git(self.geode_sdk_path, "merge-base", "--is-ancestor", ver, "HEAD")
+        # avoid spawning git if pygit2 is installed
+        if (result := self._is_sdk_at_least_pygit2(ver)) is not None:
+            return result
 
-        if code == 0:
-            return True
-        else:
-            print(output)
-            return False
+        # only the exit code matters here: 0 if ancestor, 1 if not, anything else is an error
+        code, _ = self._query_git(self.geode_sdk_path, "merge-base", "--is-ancestor", ver, "HEAD", capture=False)
+
+        if code not in (0, 1):
+            print(f"Failed to check Geode SDK version against '{ver}' (git exited with code {code}), is it a valid tag or commit?")
+
+        return code == 0
 
     def get_sdk_commit(self) -> str | None:
-        code, output = self.invoke_git(self.geode_sdk_path, "rev-parse", "HEAD")
+        code, output = self._query_git(self.geode_sdk_path, "rev-parse", "HEAD")
 
         if code != 0:
             # fatal_error(f"Failed to get Geode SDK commit:\n{output}")
@@ -135,10 +175,10 @@ class Config:
 
     def get_sdk_commit_or_tag(self) -> str | None:
         # check if we are on a tag
-        code, output = self.invoke_git(self.geode_sdk_path, "describe", "--tags", "--exact-match")
+        code, output = self._query_git(self.geode_sdk_path, "for-each-ref", "--points-at=HEAD", "--format=%(refname:short)", "refs/tags")
 
         if code == 0 and output:
-            return output
+            return output.splitlines()[0]
 
         return self.get_sdk_commit()
 
@@ -151,13 +191,15 @@ class Config:
         return version_file.read_text().strip()
 
     def get_mod_commit(self) -> str | None:
-        code, output = self.invoke_git(self.project_dir, "rev-parse", "HEAD")
+        code, output = self._query_git(self.project_dir, "rev-parse", "HEAD")
 
         if code != 0:
             return None
         return output
 
     def host_desc(self) -> str:
+        import platform
+
         if sys.platform == "linux":
             data = platform.freedesktop_os_release()
             name = data.get("PRETTY_NAME", None) or data.get("NAME", "Unknown Linux")
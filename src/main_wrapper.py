@@ -27,7 +27,8 @@ def main():
     scr_path = build.config.project_dir / "geobuild.py"
 
     if scr_path.is_file():
-        # read and execute it
+        # read and execute it. the loader is a SourceFileLoader, so the compiled bytecode is already cached in __pycache__,
+        # and unlike a plain import this lets us inject the prelude before the script runs
         spec = importlib.util.spec_from_file_location("_geobuild_inner", scr_path)
         assert spec is not None and spec.loader is not None
 
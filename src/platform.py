@@ -25,26 +25,8 @@ class Platform(Enum):
             raise ValueError(f"Unknown platform: {platform}")
 
     def platform_str(self, include_bit: bool = False) -> str:
-        out = ""
-
-        match self:
-            case Platform.Windows:
-                out = "windows"
-            case Platform.Android32 | Platform.Android64:
-                out = "android"
-            case Platform.Mac:
-                out = "macos"
-            case Platform.Ios:
-                out = "ios"
-
-        if include_bit:
-            match self:
-                case Platform.Android32:
-                    out += "32"
-                case Platform.Android64:
-                    out += "64"
-
-        return out
+        base, bit = _PLATFORM_STR[self]
+        return base + bit if include_bit else base
 
     def is_windows(self) -> bool:
         return self == Platform.Windows
@@ -72,3 +54,11 @@ class Platform(Enum):
 
     def is_32bit(self) -> bool:
         return self == Platform.Android32
+
+_PLATFORM_STR = {
+    Platform.Windows: ("windows", ""),
+    Platform.Android32: ("android", "32"),
+    Platform.Android64: ("android", "64"),
+    Platform.Mac: ("macos", ""),
+    Platform.Ios: ("ios", ""),
+}